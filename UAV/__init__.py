@@ -1,6 +1,6 @@
 from .six_rotor_uav import SixRotorUAV
 from .fdi_compensator import FDICompensator
 from .disturbance_observer import DisturbanceObserver
-from .simulation import run_simulation, plot_results
+from .simulation import run_simulation, run_batch, plot_results
 
-__all__ = ["SixRotorUAV", "FDICompensator", "run_simulation", "plot_results", "DisturbanceObserver"]
\ No newline at end of file
+__all__ = ["SixRotorUAV", "FDICompensator", "run_simulation", "run_batch", "plot_results", "DisturbanceObserver"]
\ No newline at end of file
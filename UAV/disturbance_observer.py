@@ -1,4 +1,5 @@
 import numpy as np
+from numba import njit
 
 # A disturbance observer that:
 
@@ -6,6 +7,25 @@ import numpy as np
 # Uses a gain matrix for tuning the observer response
 # Provides continuous updates to the disturbance estimate
 
+@njit(cache=True)
+def _obs_update(est, gain, vel, thrust_dir, total_thrust, M, dt):
+    """
+    Accumulate one observer step into est in place (numeric core of DisturbanceObserver.update).
+    """
+
+    # Error between actual (velocity / dt) and nominal acceleration.
+    e0 = vel[0] / dt - (total_thrust / M) * thrust_dir[0]
+    e1 = vel[1] / dt - (total_thrust / M) * thrust_dir[1]
+    e2 = vel[2] / dt - (total_thrust / M) * thrust_dir[2] + 9.81
+
+    # Unrolled 3x3 matvec.
+    d0 = gain[0, 0] * e0 + gain[0, 1] * e1 + gain[0, 2] * e2
+    d1 = gain[1, 0] * e0 + gain[1, 1] * e1 + gain[1, 2] * e2
+    d2 = gain[2, 0] * e0 + gain[2, 1] * e1 + gain[2, 2] * e2
+    est[0] += dt * d0
+    est[1] += dt * d1
+    est[2] += dt * d2
+
 class DisturbanceObserver:
     def __init__(self, mass, gain_matrix=None):
         """
@@ -35,19 +55,11 @@ class DisturbanceObserver:
             dt (float): Time step.
             
         Returns:
-            numpy.ndarray: Updated disturbance estimate.
+            numpy.ndarray: Updated disturbance estimate. This is the observer's internal
+                buffer, updated in place on every call; copy it to keep a snapshot.
         """
 
-        velocity = state[3:]
-        
-        # Nominal acceleration (without disturbance)
-        nominal_accel = (total_thrust / self.M) * thrust_direction - np.array([0, 0, 9.81])
-        
-        # Actual acceleration (approximated from velocity)
-        actual_accel = velocity / dt
-        
-        # Update disturbance estimate
-        error = actual_accel - nominal_accel
-        self.estimated_disturbance += dt * np.dot(self.gain_matrix, error)
+        _obs_update(self.estimated_disturbance, self.gain_matrix, state[3:], thrust_direction,
+                    total_thrust, self.M, dt)
         
         return self.estimated_disturbance
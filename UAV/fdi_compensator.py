@@ -39,12 +39,12 @@ class FDICompensator:
         Returns:
             numpy.ndarray: Compensated rotor speeds.
         """
-        healthy_rotors = np.sum(rotor_states)
-        if healthy_rotors == 0:
-            return np.zeros(self.num_rotors)
+        rotor_states = np.asarray(rotor_states, dtype=float)
+        healthy_rotors = rotor_states.sum()
         
-        # Redistribute thrust among healthy rotors
-        base_thrust = desired_thrust / healthy_rotors
-        compensated_speeds = np.where(rotor_states == 1, base_thrust, 0)
+        # Redistribute thrust among healthy rotors; the states act as a 0/1 mask,
+        # so the result is all zeros when no rotor is healthy
+        base_thrust = desired_thrust / max(healthy_rotors, 1.0)
+        compensated_speeds = base_thrust * rotor_states
         
         return compensated_speeds
\ No newline at end of file
@@ -1,69 +1,232 @@
+import os
+import sys
+from importlib.util import find_spec
+
 import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib import animation
-import matplotlib
-matplotlib.use('TkAgg')  # Use TkAgg backend for interactive plotting
+from numba import njit, prange
 from .six_rotor_uav import SixRotorUAV
 from .disturbance_observer import DisturbanceObserver
 from .fdi_compensator import FDICompensator
 
-def run_simulation(total_time=2.0, dt=0.01):
+@njit(cache=True)
+def _sim_kernel(dt, state0, a_const, gamma_over_M, disturbance, est0, dt_gain, nominal, states, dist):
     """
-    Run a complete UAV simulation with disturbance and fault injection.
+    Run the whole fixed-input simulation loop: UAV dynamics plus disturbance observer.
+    disturbance is the (N, 3) external force applied at each step, nominal is the acceleration
+    assumed by the observer and dt_gain is the observer gain matrix pre-multiplied by dt.
+    Results are written into states (N, 6) and dist (N, 3), in the precision of the arrays passed in.
+    """
+
+    x, y, z = state0[0], state0[1], state0[2]
+    vx, vy, vz = state0[3], state0[4], state0[5]
+    dx, dy, dz = est0[0], est0[1], est0[2]
+    n0, n1, n2 = nominal[0], nominal[1], nominal[2]
+
+    for i in range(states.shape[0]):
+        # UAV dynamics (semi-implicit Euler: velocity first, then position).
+        ax = a_const[0] - gamma_over_M[0] * vx + disturbance[i, 0]
+        ay = a_const[1] - gamma_over_M[1] * vy + disturbance[i, 1]
+        az = a_const[2] - gamma_over_M[2] * vz + disturbance[i, 2]
+        vx += ax * dt
+        vy += ay * dt
+        vz += az * dt
+        x += vx * dt
+        y += vy * dt
+        z += vz * dt
+
+        # Disturbance observer.
+        e0 = vx / dt - n0
+        e1 = vy / dt - n1
+        e2 = vz / dt - n2
+        dx += dt_gain[0, 0] * e0 + dt_gain[0, 1] * e1 + dt_gain[0, 2] * e2
+        dy += dt_gain[1, 0] * e0 + dt_gain[1, 1] * e1 + dt_gain[1, 2] * e2
+        dz += dt_gain[2, 0] * e0 + dt_gain[2, 1] * e1 + dt_gain[2, 2] * e2
+
+        states[i, 0] = x
+        states[i, 1] = y
+        states[i, 2] = z
+        states[i, 3] = vx
+        states[i, 4] = vy
+        states[i, 5] = vz
+        dist[i, 0] = dx
+        dist[i, 1] = dy
+        dist[i, 2] = dz
+
+@njit(parallel=True, cache=True)
+def _batch_kernel(dt, state0, a_const, gamma_over_M, disturbance, est0, dt_gain, nominal, states, dist):
+    """
+    Run _sim_kernel for K independent trajectories in parallel. Per-trajectory inputs and
+    outputs carry a leading axis of length K.
+    """
+
+    for k in prange(states.shape[0]):
+        _sim_kernel(dt, state0, a_const[k], gamma_over_M[k], disturbance[k], est0, dt_gain[k], nominal[k],
+                    states[k], dist[k])
+
+def _float_dtype(dtype):
+    """
+    Normalise the dtype argument of run_simulation/run_batch; only float32 and float64 are supported.
+    """
+    dtype = np.dtype(dtype)
+    if dtype not in (np.float32, np.float64):
+        raise ValueError(f"dtype must be float32 or float64, got {dtype}")
+    return dtype
+
+def _scenario(total_time, dt, mass=None):
+    """
+    Set up the simulated scenario shared by run_simulation and run_batch: a six-rotor UAV
+    at a fixed attitude and constant rotor speeds, with a wind disturbance from t=1.0s.
     
     Parameters:
         total_time (float): Total simulation time in seconds
         dt (float): Time step in seconds
+        mass (float or numpy.ndarray): Mass used for the mass-dependent terms; defaults to the
+            UAV mass, or a (K, 1) array for batched runs
     
     Returns:
-        dict: Simulation results containing states, times, and other data
+        dict: uav, rotor_speeds, time_steps, times, accel_const, gamma_over_M, nominal_accel (the
+            acceleration assumed by the observer), disturbance_idx (first step with wind) and wind
     """
-    time_steps = int(total_time / dt)
-    times = np.linspace(0, total_time, time_steps)
+    time_steps = int(round(total_time / dt))
+    times = np.arange(time_steps) * dt
     
-    # Initialize UAV and components
+    # Initialize UAV and set initial conditions
     uav = SixRotorUAV(mass=6.0, g=9.81, air_resistance=(0.1, 0.1, 0.1), p_const=0.05)
-    observer = DisturbanceObserver(mass=6.0)
-    fdi = FDICompensator(num_rotors=6)
-    
-    # Set initial conditions
     uav.set_euler_angles(roll=0.1, pitch=0.05, yaw=0.2)
-    base_rotor_speeds = np.array([400, 400, 400, 400, 400, 400])
+    base_rotor_speeds = np.array([400.0, 400.0, 400.0, 400.0, 400.0, 400.0])
+    if mass is None:
+        mass = uav.M
     
-    # Initialize storage arrays
-    states = []
-    disturbances = []
-    rotor_states = []
+    # Rotor speeds and attitude are constant over the run, so the thrust term is too.
+    total_thrust = uav.compute_total_thrust(base_rotor_speeds)
+    thrust_dir = uav.get_thrust_direction()
     
-    # Add artificial disturbance at t=1.0s
+    # Add artificial wind disturbance at t=1.0s
     disturbance_time = 1.0
     
-    # Simulate
-    for t in times:
-        # Add artificial wind disturbance
-        if t >= disturbance_time:
-            disturbance = np.array([0.5, 0.3, 0.0])  # Wind force
-        else:
-            disturbance = np.zeros(3)
-            
-        # Update UAV dynamics
-        state = uav.update_dynamics(base_rotor_speeds, dt, disturbance)
-        
-        # Estimate disturbance
-        thrust_dir = uav.get_thrust_direction()
-        total_thrust = uav.compute_total_thrust(base_rotor_speeds)
-        est_disturbance = observer.update(state, thrust_dir, total_thrust, dt)
-        
-        # Store results
-        states.append(state.copy())
-        disturbances.append(est_disturbance.copy())
-        
     return {
+        'uav': uav,
+        'rotor_speeds': base_rotor_speeds,
+        'time_steps': time_steps,
         'times': times,
-        'states': np.array(states),
-        'disturbances': np.array(disturbances)
+        'accel_const': (total_thrust / mass) * thrust_dir - np.array([0, 0, uav.G]),
+        'gamma_over_M': uav.gamma / mass,
+        'nominal_accel': (total_thrust / mass) * thrust_dir - np.array([0, 0, 9.81]),
+        'disturbance_idx': int(np.ceil(disturbance_time / dt - 1e-9)),  # First step with i*dt >= disturbance_time
+        'wind': np.array([0.5, 0.3, 0.0])  # Wind force
     }
 
+def run_simulation(total_time=2.0, dt=0.01, dtype=np.float64):
+    """
+    Run a complete UAV simulation with disturbance and fault injection.
+    
+    Parameters:
+        total_time (float): Total simulation time in seconds
+        dt (float): Time step in seconds
+        dtype (numpy.dtype or type): Precision of the integration and of the returned states and
+            disturbances, e.g. np.float32 or 'float32'; float32 halves their memory footprint
+    
+    Returns:
+        dict: Simulation results containing states, times, and other data
+    """
+    dtype = _float_dtype(dtype)
+    scenario = _scenario(total_time, dt)
+    time_steps = scenario['time_steps']
+    
+    # Initialize components
+    uav = scenario['uav']
+    observer = DisturbanceObserver(mass=uav.M)
+    fdi = FDICompensator(num_rotors=6)
+    
+    disturbance = np.zeros((time_steps, 3), dtype=dtype)
+    disturbance[scenario['disturbance_idx']:] = scenario['wind']
+    
+    # Simulate
+    states = np.empty((time_steps, 6), dtype=dtype)
+    disturbances = np.empty((time_steps, 3), dtype=dtype)
+    _sim_kernel(
+        dtype.type(dt),
+        uav.state.astype(dtype, copy=False),
+        scenario['accel_const'].astype(dtype, copy=False),
+        scenario['gamma_over_M'].astype(dtype, copy=False),
+        disturbance,
+        observer.estimated_disturbance.astype(dtype, copy=False),
+        (dt * observer.gain_matrix).astype(dtype, copy=False),
+        scenario['nominal_accel'].astype(dtype, copy=False),
+        states, disturbances)
+    
+    return {
+        'times': scenario['times'],
+        'states': states,
+        'disturbances': disturbances
+    }
+
+def run_batch(params, total_time=2.0, dt=0.01, dtype=np.float64):
+    """
+    Run many independent simulations of the run_simulation scenario in parallel,
+    e.g. for observer gain tuning or wind/mass parameter sweeps.
+    
+    Parameters:
+        params (numpy.ndarray): (K, 5) array, or a single row of 5; each row is
+            [mass, wind_x, wind_y, wind_z, observer_gain] for one trajectory, where the
+            observer gain matrix is observer_gain * I
+        total_time (float): Total simulation time in seconds
+        dt (float): Time step in seconds
+        dtype (numpy.dtype or type): Precision of the integration and of the returned arrays
+    
+    Returns:
+        dict: times (N,), states (K, N, 6) and disturbances (K, N, 3)
+    """
+    dtype = _float_dtype(dtype)
+    params = np.atleast_2d(np.asarray(params, dtype=np.float64))
+    if params.ndim != 2 or params.shape[1] != 5:
+        raise ValueError(
+            f"params must have shape (K, 5) with rows [mass, wind_x, wind_y, wind_z, observer_gain], got {params.shape}")
+    wind = params[:, 1:4]
+    gain = params[:, 4]
+    num_runs = params.shape[0]
+    
+    scenario = _scenario(total_time, dt, mass=params[:, 0:1])
+    time_steps = scenario['time_steps']
+    
+    # Each trajectory's wind switches on at the scenario's onset step
+    onset = (np.arange(time_steps) >= scenario['disturbance_idx'])[None, :, None]
+    disturbance = np.where(onset, wind[:, None, :], 0.0).astype(dtype, copy=False)
+    
+    states = np.empty((num_runs, time_steps, 6), dtype=dtype)
+    disturbances = np.empty((num_runs, time_steps, 3), dtype=dtype)
+    _batch_kernel(
+        dtype.type(dt),
+        scenario['uav'].state.astype(dtype, copy=False),
+        scenario['accel_const'].astype(dtype, copy=False),
+        scenario['gamma_over_M'].astype(dtype, copy=False),
+        disturbance,
+        np.zeros(3, dtype=dtype),
+        (dt * gain[:, None, None] * np.eye(3)).astype(dtype, copy=False),
+        scenario['nominal_accel'].astype(dtype, copy=False),
+        states, disturbances)
+    
+    return {
+        'times': scenario['times'],
+        'states': states,
+        'disturbances': disturbances
+    }
+
+def _select_backend():
+    """
+    Use the TkAgg backend for interactive plotting, unless the caller has already chosen a
+    backend (by importing pyplot or setting MPLBACKEND) or Tk cannot be used here.
+    """
+    import matplotlib
+    
+    if 'matplotlib.pyplot' in sys.modules or os.environ.get('MPLBACKEND'):
+        return
+    if sys.platform.startswith('linux') and not (os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY')):
+        return
+    if find_spec('tkinter') is None:
+        return
+    matplotlib.use('TkAgg')
+
 def plot_results(results):
     """
     Create visualization plots for the simulation results.
@@ -71,6 +234,10 @@ def plot_results(results):
     Parameters:
         results (dict): Simulation results from run_simulation()
     """
+    # Plotting dependencies are loaded here so importing the simulation stays GUI-free
+    _select_backend()
+    import matplotlib.pyplot as plt
+    
     times = results['times']
     states = results['states']
     disturbances = results['disturbances']
@@ -1,4 +1,45 @@
+from math import sin, cos
+
 import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def _step(state, thrust_dir, gamma, M, G, p_const, rotor_speeds, dt, disturbance):
+    """
+    Advance the state vector in place by one semi-implicit Euler step (numeric core of update_dynamics).
+    disturbance may be None, in which case the term is compiled out.
+    """
+
+    # Total thrust P̄ = p_const * sum(P_k^2).
+    sum_sq = 0.0
+    for k in range(rotor_speeds.shape[0]):
+        sum_sq += rotor_speeds[k] * rotor_speeds[k]
+    P_bar = p_const * sum_sq
+
+    vx = state[3]
+    vy = state[4]
+    vz = state[5]
+
+    ax = (P_bar / M) * thrust_dir[0] - gamma[0] * vx / M
+    ay = (P_bar / M) * thrust_dir[1] - gamma[1] * vy / M
+    az = (P_bar / M) * thrust_dir[2] - G - gamma[2] * vz / M
+    if disturbance is not None:
+        ax += disturbance[0]
+        ay += disturbance[1]
+        az += disturbance[2]
+
+    # Semi-implicit Euler: update velocity first, then advance position with the new velocity.
+    vx += ax * dt
+    vy += ay * dt
+    vz += az * dt
+    state[3] = vx
+    state[4] = vy
+    state[5] = vz
+    state[0] += vx * dt
+    state[1] += vy * dt
+    state[2] += vz * dt
+
 
 class SixRotorUAV:
     def __init__(self, mass=1.0, g=9.81, air_resistance=(0.1, 0.1, 0.1), p_const=1.0):
@@ -14,25 +55,33 @@ class SixRotorUAV:
 
         self.M = mass
         self.G = g
-        self.Gamma = np.diag(air_resistance)
+        self.gamma = np.asarray(air_resistance, dtype=np.float64)  # Diagonal of Gamma
         self.p_const = p_const
 
         # UAV state vector: [x, y, z, vx, vy, vz]
         self.state = np.zeros(6)
         
-        # Euler angles (in radians): [roll (χ), pitch (ψ), yaw (φ)]
-        self.euler = np.zeros(3)
+        # Attitude, carried as the unit thrust direction T1 * Θ3 in the inertial frame
+        # (level flight by default). Only the third column of R enters the dynamics.
+        self.thrust_dir = np.array([0.0, 0.0, 1.0])
     
     def set_euler_angles(self, roll, pitch, yaw):
         """
-        Set the Euler angles of the UAV.
+        Set the attitude of the UAV from Euler angles, stored as the thrust direction.
         
         Parameters:
             roll (float): Roll angle χ.
             pitch (float): Pitch angle ψ.
             yaw (float): Yaw angle φ.
         """
-        self.euler = np.array([roll, pitch, yaw])
+        # Third column of the rotation matrix R.
+        cr = cos(roll)
+        sr = sin(roll)
+        cp = cos(pitch)
+        sp = sin(pitch)
+        cy = cos(yaw)
+        sy = sin(yaw)
+        self.thrust_dir = np.array([cy*sp*cr + sy*sr, sy*sp*cr - cy*sr, cp*cr])
     
     def set_state(self, x, y, z, vx, vy, vz):
         """
@@ -46,7 +95,7 @@ class SixRotorUAV:
             vy (float): y-velocity.
             vz (float): z-velocity.
         """
-        self.state = np.array([x, y, z, vx, vy, vz])
+        self.state = np.array([x, y, z, vx, vy, vz], dtype=np.float64)
 
     def rotation_matrix(self, roll, pitch, yaw):
         """
@@ -62,12 +111,12 @@ class SixRotorUAV:
             numpy.ndarray: 3x3 rotation matrix.
         """
         
-        cr = np.cos(roll)
-        sr = np.sin(roll)
-        cp = np.cos(pitch)
-        sp = np.sin(pitch)
-        cy = np.cos(yaw)
-        sy = np.sin(yaw)
+        cr = cos(roll)
+        sr = sin(roll)
+        cp = cos(pitch)
+        sp = sin(pitch)
+        cy = cos(yaw)
+        sy = sin(yaw)
 
         R = np.array([
             [cy*cp,         cy*sp*sr - sy*cr,    cy*sp*cr + sy*sr],
@@ -79,18 +128,14 @@ class SixRotorUAV:
     
     def get_thrust_direction(self):
         """
-        Compute the direction of the thrust vector in the earth-fixed frame.
-        Since the thrust is along the body z-axis, we multiply the constant vector Θ3 = [0, 0, 1]^T
-        by the transformation matrix T1 (which is the same as the rotation matrix R here).
+        Return the direction of the thrust vector in the earth-fixed frame, T1 * Θ3 with Θ3 = [0, 0, 1]^T.
+        It is computed by set_euler_angles and stored as self.thrust_dir; that array is returned, not a copy.
         
         Returns:
             numpy.ndarray: 3x1 vector representing the direction of the thrust in the inertial frame.
         """
 
-        roll, pitch, yaw = self.euler
-        R = self.rotation_matrix(roll, pitch, yaw)
-        thrust_direction = R[:, 2]
-        return thrust_direction
+        return self.thrust_dir
     
     def compute_total_thrust(self, rotor_speeds):
         """
@@ -106,11 +151,11 @@ class SixRotorUAV:
             float: Total thrust.
         """
         
-        rotor_speeds = np.array(rotor_speeds)
-        total_thrust = self.p_const * np.sum(rotor_speeds**2)
+        rotor_speeds = np.asarray(rotor_speeds, dtype=np.float64)
+        total_thrust = self.p_const * np.dot(rotor_speeds, rotor_speeds)
         return total_thrust
 
-    def update_dynamics(self, rotor_speeds, dt, disturbance=np.zeros(3)):
+    def update_dynamics(self, rotor_speeds, dt, disturbance=None):
         """
         Update the UAV dynamics over a time step dt.
         
@@ -118,32 +163,29 @@ class SixRotorUAV:
             1) dot(Δ) = Φ
             2) dot(Φ) = (P̄/M) * (T1 * Θ3) - G * Θ3 - (Γ/M) * Φ + disturbance
         
-        Here, Θ3 = [0, 0, 1]^T and T1 * Θ3 is computed via the rotation matrix.
+        Here, Θ3 = [0, 0, 1]^T and T1 * Θ3 is the stored thrust direction self.thrust_dir (set by set_euler_angles).
         An optional disturbance (e.g., lumped external disturbance) can be added.
+        The state is integrated with semi-implicit Euler (velocity first, then position).
         
         Parameters:
             rotor_speeds (array-like): Speeds of the six rotors.
             dt (float): Time step for integration.
-            disturbance (numpy.ndarray): 3x1 vector of disturbances (default is zero).
+            disturbance (numpy.ndarray): 3x1 vector of disturbances (default None, i.e. no disturbance).
         
         Returns:
-            numpy.ndarray: Updated state vector [x, y, z, vx, vy, vz].
+            numpy.ndarray: Updated state vector [x, y, z, vx, vy, vz]. This is self.state itself,
+                updated in place on every call; copy it to keep a snapshot.
         """
         
-        # Compute total thrust.
-        P_bar = self.compute_total_thrust(rotor_speeds)
-        
-        # Get the thrust direction in the inertial frame.
-        thrust_dir = self.get_thrust_direction()
-        
-        # Current velocity.
-        velocity = self.state[3:]
-        
-        # Compute acceleration:
-        acceleration = (P_bar / self.M) * thrust_dir - np.array([0, 0, self.G]) - (np.dot(self.Gamma, velocity) / self.M) + disturbance
-        
-        # Update position and velocity using Euler integration.
-        self.state[:3] += velocity * dt        # Update position.
-        self.state[3:] += acceleration * dt    # Update velocity.
-        
+        if disturbance is not None:
+            disturbance = np.asarray(disturbance, dtype=np.float64)
+
+        # The kernel writes into self.state in place; a non-float state would silently truncate.
+        if self.state.dtype != np.float64:
+            self.state = self.state.astype(np.float64)
+
+        _step(
+            self.state, self.thrust_dir, self.gamma, self.M, self.G, self.p_const,
+            np.asarray(rotor_speeds, dtype=np.float64), dt, disturbance)
+
         return self.state
\ No newline at end of file
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from UAV import DisturbanceObserver, run_simulation
+from UAV.simulation import _scenario
+
+
+@pytest.mark.parametrize("dt", [0.01, 0.03])
+def test_run_simulation_matches_step_by_step_components(dt):
+    """
+    run_simulation's fused kernel must agree with stepping SixRotorUAV.update_dynamics
+    and DisturbanceObserver.update through the same scenario.
+    """
+    total_time = 2.0
+    results = run_simulation(total_time=total_time, dt=dt)
+
+    scenario = _scenario(total_time, dt)
+    uav = scenario['uav']
+    observer = DisturbanceObserver(mass=uav.M)
+    rotor_speeds = scenario['rotor_speeds']
+    total_thrust = uav.compute_total_thrust(rotor_speeds)
+
+    states = []
+    disturbances = []
+    for i in range(scenario['time_steps']):
+        disturbance = scenario['wind'] if i >= scenario['disturbance_idx'] else None
+        state = uav.update_dynamics(rotor_speeds, dt, disturbance)
+        est = observer.update(state, uav.get_thrust_direction(), total_thrust, dt)
+        states.append(state.copy())
+        disturbances.append(est.copy())
+
+    np.testing.assert_allclose(results['states'], np.array(states), rtol=1e-12, atol=1e-9)
+    np.testing.assert_allclose(results['disturbances'], np.array(disturbances), rtol=1e-12, atol=1e-9)